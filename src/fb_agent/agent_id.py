@@ -3,6 +3,7 @@ from __future__ import annotations
 import hashlib
 import platform
 import socket
+import uuid
 from pathlib import Path
 
 from .paths import agent_state_dir
@@ -21,14 +22,18 @@ def generate_stable_agent_id() -> str:
             return agent_id
     
     # Generate from hostname + MAC
+    # uuid.getnode() reads the hardware address locally (no DNS lookup).
+    # Without one it returns a random value with the multicast bit set,
+    # which would not be stable: fall back to the node name then.
     hostname = socket.gethostname()
-    try:
-        mac = ":".join([f"{i:02x}" for i in socket.gethostbyname(socket.gethostname()).encode()[:6]])
-    except Exception:
+    node = uuid.getnode()
+    if (node >> 40) & 1:
         mac = platform.node()
+    else:
+        mac = f"{node:012x}"
     
     seed = f"{hostname}:{mac}:{platform.system()}"
-    agent_id = hashlib.sha256(seed.encode()).hexdigest()[:16]
+    agent_id = hashlib.blake2b(seed.encode(), digest_size=8).hexdigest()
     
     state_file.write_text(agent_id, encoding="utf-8")
     return agent_id
@@ -1,35 +1,325 @@
 from __future__ import annotations
 
+import asyncio
+import glob
 import json
+import logging
+import re
+import subprocess
+import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from fastapi import FastAPI, Header, HTTPException, Request
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 
 from . import __version__
-from .fm_discovery import find_fm_binary
+from .fm_discovery import FM_SITES_BASES, find_fm_binary
 from .fm_list_parser import list_sites
 from .paths import agent_state_dir
 from .pty_executor import execute_backup_via_fm_shell
-from .security import verify_request
+from .security import unb64url, verify_request
+
+logger = logging.getLogger(__name__)
+
+# Serialized /api/time body for the current second: (unix ts, json bytes)
+_time_cache: tuple[int, bytes] = (0, b"")
+
+# Signing constants (Dashboard format: sorted keys, no spaces, {} for no body)
+_BODY_METHODS = frozenset(("POST", "PUT", "PATCH"))
+_EMPTY_BODY = b"{}"
+_JSON_SEPARATORS = (",", ":")
+
+# Endpoints reachable without a signature (FastAPI docs stay public as before)
+_PUBLIC_PATHS = frozenset(("/health", "/api/time", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"))
+
+# Allowed characters in a site name (also keeps it shell-safe for fm shell).
+_SITE_RE = re.compile(r"[A-Za-z0-9._\-]+")
+
+# Resolved site roots for artifact downloads: site name -> (monotonic ts, root)
+_SITE_ROOT_TTL = 30.0
+_fm_list_cache: dict[str, tuple[float, Path]] = {}
+
+# One `fm list` table row: │ site │ status │ path │
+_FM_ROW_RE = re.compile(
+    r"^[ \t]*│[ \t]*([^│\n]+?)[ \t]*│[ \t]*([^│\n]+?)[ \t]*│[ \t]*([^│\n]+?)[ \t]*│",
+    re.MULTILINE,
+)
+
+
+def _is_site_root(path: Path) -> bool:
+    return path.exists() and (path / "workspace" / "frappe-bench").exists()
+
+
+def _cached_site_root(site_name: str) -> Path | None:
+    cached = _fm_list_cache.get(site_name)
+    if cached is None:
+        return None
+    ts, site_root = cached
+    if time.monotonic() - ts < _SITE_ROOT_TTL and site_root.exists():
+        return site_root
+    return None
+
+
+def _fm_list_table_paths(output: str) -> dict[str, str]:
+    """
+    Map site name -> path column from `fm list` table rows:
+    │ site │ status │ path │
+    """
+    paths: dict[str, str] = {}
+    for m in _FM_ROW_RE.finditer(output):
+        paths.setdefault(m.group(1), m.group(3).rstrip('…').rstrip('.'))
+    return paths
+
+
+def _search_site_root(site_name: str) -> Path | None:
+    """Search common Frappe Manager locations for a site's root directory."""
+    # Usually the directory is named after the site: probe it directly
+    for base in FM_SITES_BASES:
+        candidate = base / site_name
+        if (candidate / "workspace" / "frappe-bench").exists():
+            return candidate
+    
+    # Fall back to directories that merely contain the site name
+    pattern = f"*{glob.escape(site_name)}*"
+    for base in FM_SITES_BASES:
+        if base.exists():
+            for site_dir in base.glob(pattern):
+                if site_dir.is_dir() and (site_dir / "workspace" / "frappe-bench").exists():
+                    return site_dir
+    return None
+
+
+def _has_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return True
+    if isinstance(obj, dict):
+        return any(_has_float(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_float(v) for v in obj)
+    return False
+
+
+def _canonical_body(raw_body: bytes) -> bytes:
+    """
+    Normalize a JSON body to the Dashboard signing format
+    (sorted keys, no spaces). Non-JSON bodies are signed as-is.
+    """
+    try:
+        body_obj = orjson.loads(raw_body)
+        body_bytes = orjson.dumps(body_obj, option=orjson.OPT_SORT_KEYS)
+        # Dashboard uses json.dumps, which escapes non-ASCII and DEL
+        # (ensure_ascii) and formats floats differently (1e+20 vs orjson's
+        # 1e20); orjson also reads ints beyond 64 bits as floats. Only trust
+        # orjson's bytes when none of that can occur.
+        if body_bytes.isascii() and b"\x7f" not in body_bytes and not _has_float(body_obj):
+            return body_bytes
+    except Exception:
+        pass
+    # Re-parse with stdlib so big ints and float text round-trip as json does
+    try:
+        body_obj = json.loads(raw_body)
+    except Exception:
+        # If not JSON, use raw bytes
+        return raw_body
+    return json.dumps(body_obj, separators=_JSON_SEPARATORS, sort_keys=True).encode("utf-8")
+
+
+class ArtifactFileResponse(FileResponse):
+    """
+    FileResponse for backup artifacts (often hundreds of MB).
+    Larger reads than Starlette's 64 KiB default cut syscalls per download.
+    """
+
+    chunk_size = 1024 * 1024
+
+
+class PureASGICors:
+    """
+    Minimal CORS middleware written directly against ASGI.
+    Allows any origin with credentials (Dashboard fetches agent time from
+    the browser): the request Origin is echoed back with `Vary: Origin`,
+    since browsers reject `*` together with credentials. Preflight requests
+    are answered directly; other responses get the allow headers injected
+    without wrapping them in Request/Response objects.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        # Pre-encode once; these never change for the lifetime of the app.
+        self.headers: list[tuple[bytes, bytes]] = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        self.preflight_headers: list[tuple[bytes, bytes]] = [
+            *self.headers,
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-max-age", b"600"),
+            (b"content-length", b"0"),
+        ]
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: bytes | None = None
+        request_method: bytes | None = None
+        request_headers: bytes | None = None
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"access-control-request-method":
+                request_method = value
+            elif key == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            # Not a CORS request
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            headers = [(b"access-control-allow-origin", origin), *self.preflight_headers]
+            if request_headers is not None:
+                # allow_headers=["*"]: echo whatever the browser asked for
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cors_headers = [(b"access-control-allow-origin", origin), *self.headers]
+
+        async def send_with_cors(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+class HmacAuthMiddleware:
+    """
+    Verify Dashboard HMAC signatures directly on the ASGI scope.
+    Public paths pass through; anything else needs valid X-Signature and
+    X-Timestamp headers or gets a 401 `{"detail": ...}` response.
+    """
+
+    def __init__(self, app: Any, secret_bytes: bytes) -> None:
+        self.app = app
+        self.secret_bytes = secret_bytes
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] in _PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.secret_bytes:
+            await _send_unauthorized(send, "not_registered")
+            return
+
+        signature: bytes | None = None
+        timestamp: bytes | None = None
+        for key, value in scope["headers"]:
+            if key == b"x-signature":
+                signature = value
+            elif key == b"x-timestamp":
+                timestamp = value
+
+        if not signature or not timestamp:
+            await _send_unauthorized(send, "missing_signature")
+            return
+
+        try:
+            req_ts = int(timestamp)
+        except ValueError:
+            await _send_unauthorized(send, "invalid_timestamp")
+            return
+
+        if not signature.isascii():
+            await _send_unauthorized(send, "invalid_signature")
+            return
+        sig = signature.decode("ascii")
+        method = scope["method"]
+        # Use path without query params for signature verification (Dashboard signs path only)
+        path = scope["path"]
+
+        def verify(body: bytes) -> bool:
+            return verify_request(
+                secret=self.secret_bytes,
+                method=method,
+                path=path,
+                body=body,
+                signature=sig,
+                req_timestamp=req_ts,
+            )
+
+        # Dashboard signs JSON bodies with canonical formatting (sorted keys, no spaces)
+        # For GET requests (and empty bodies), body is {}
+        if method not in _BODY_METHODS:
+            ok = verify(_EMPTY_BODY)
+        else:
+            chunks: list[bytes] = []
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] != "http.request":
+                    # Client went away before sending the whole body
+                    return
+                chunks.append(message.get("body", b""))
+                more_body = message.get("more_body", False)
+            raw_body = b"".join(chunks)
+
+            if not raw_body:
+                ok = verify(_EMPTY_BODY)
+            else:
+                # Dashboard bodies normally arrive already compact; try the
+                # raw bytes first and only canonicalize if that doesn't verify
+                head = raw_body[:64]
+                ok = (b": " not in head and b", " not in head and verify(raw_body)) or verify(
+                    _canonical_body(raw_body)
+                )
+
+            # Replay the buffered body to the app exactly once
+            upstream_receive = receive
+            replayed = False
+
+            async def receive_buffered() -> dict[str, Any]:
+                nonlocal replayed
+                if replayed:
+                    return await upstream_receive()
+                replayed = True
+                return {"type": "http.request", "body": raw_body, "more_body": False}
+
+            receive = receive_buffered
+
+        if not ok:
+            await _send_unauthorized(send, "invalid_signature")
+            return
+
+        await self.app(scope, receive, send)
+
+
+async def _send_unauthorized(send: Any, detail: str) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
 
 
 def create_app(*, fm_binary: Path | None, shared_secret: str | None) -> FastAPI:
     """
     Create FastAPI app with allowlisted actions only.
     """
-    app = FastAPI(title="fb-agent", version=__version__)
-    
-    # Add CORS middleware to allow Dashboard to fetch agent time
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "OPTIONS"],
-        allow_headers=["*"],
-    )
+    app = FastAPI(title="fb-agent", version=__version__, default_response_class=ORJSONResponse)
     
     if fm_binary is None:
         fm_binary = find_fm_binary()
@@ -39,54 +329,81 @@ def create_app(*, fm_binary: Path | None, shared_secret: str | None) -> FastAPI:
     
     app.state.fm_binary = fm_binary
     app.state.shared_secret = shared_secret or ""
+    # Decode the base64url secret once instead of on every request
+    app.state._secret_bytes = unb64url(shared_secret) if shared_secret else b""
+    
+    # Verify HMAC signature on all non-public requests
+    app.add_middleware(HmacAuthMiddleware, secret_bytes=app.state._secret_bytes)
+    # Add CORS middleware (outermost) to allow Dashboard to fetch agent time
+    app.add_middleware(PureASGICors)
+    
+    site_root_lock = asyncio.Lock()
+    
+    async def run_fm_list() -> str:
+        """Run `fm list` without blocking the event loop."""
+        cmd = [str(app.state.fm_binary), "list"]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(cmd, 10)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+        return stdout.decode("utf-8", errors="replace")
     
-    async def require_auth(request: Request, x_signature: str | None = None, x_timestamp: str | None = None) -> None:
+    async def refresh_site_roots() -> dict[str, str]:
         """
-        Verify HMAC signature on all requests.
+        Run `fm list` once and cache every site root it reports directly.
+        Returns the raw site -> listed path mapping.
         """
-        if not app.state.shared_secret:
-            raise HTTPException(status_code=401, detail="not_registered")
-        
-        if not x_signature or not x_timestamp:
-            raise HTTPException(status_code=401, detail="missing_signature")
-        
-        try:
-            req_ts = int(x_timestamp)
-        except ValueError:
-            raise HTTPException(status_code=401, detail="invalid_timestamp")
-        
-        # Get body for signature verification
-        # Dashboard signs JSON bodies with canonical formatting (sorted keys, no spaces)
-        # For GET requests, body is empty {}
-        body_bytes = b"{}"
-        if request.method in {"POST", "PUT", "PATCH"}:
-            raw_body = await request.body()
-            if raw_body:
-                try:
-                    import json
-                    body_obj = json.loads(raw_body)
-                    # Normalize to match Dashboard format
-                    body_bytes = json.dumps(body_obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
-                except Exception:
-                    # If not JSON, use raw bytes
-                    body_bytes = raw_body
-            else:
-                body_bytes = b"{}"
-        # For GET requests, Dashboard signs with empty body {}
-        # Path includes query params in signature (but we use path only for consistency)
+        listed = _fm_list_table_paths(await run_fm_list())
+        now = time.monotonic()
+        for name, listed_path in listed.items():
+            candidate = Path(listed_path)
+            if _is_site_root(candidate):
+                _fm_list_cache[name] = (now, candidate)
+        return listed
+    
+    async def lookup_site_root(site_name: str) -> tuple[Path | None, str | None]:
+        """
+        Resolve a site's root directory, consulting the TTL cache first.
+        The lock keeps concurrent downloads from all spawning `fm list`.
+        """
+        site_root = _cached_site_root(site_name)
+        if site_root is not None:
+            return site_root, None
         
-        # Use path without query params for signature verification (Dashboard signs path only)
-        path_for_sig = request.url.path
+        async with site_root_lock:
+            site_root = _cached_site_root(site_name)
+            if site_root is not None:
+                return site_root, None
+            
+            # fm list may truncate paths with '…'; refresh_site_roots only
+            # caches paths that exist, otherwise search for the full path
+            truncated_path = (await refresh_site_roots()).get(site_name)
+            site_root = _cached_site_root(site_name)
+            if site_root is None:
+                site_root = _search_site_root(site_name)
+                if site_root is not None:
+                    _fm_list_cache[site_name] = (time.monotonic(), site_root)
+            return site_root, truncated_path
+    
+    @app.on_event("startup")
+    async def prewarm_site_roots() -> None:
+        """Fill the site root cache before the first download arrives."""
+        async def prewarm() -> None:
+            try:
+                await refresh_site_roots()
+            except Exception:
+                pass
         
-        if not verify_request(
-            secret=app.state.shared_secret,
-            method=request.method,
-            path=path_for_sig,
-            body=body_bytes,
-            signature=x_signature,
-            req_timestamp=req_ts,
-        ):
-            raise HTTPException(status_code=401, detail="invalid_signature")
+        app.state.prewarm_task = asyncio.create_task(prewarm())
     
     @app.get("/health")
     def health() -> dict[str, Any]:
@@ -94,44 +411,32 @@ def create_app(*, fm_binary: Path | None, shared_secret: str | None) -> FastAPI:
         return {"ok": True, "version": __version__}
     
     @app.get("/api/list_sites")
-    async def api_list_sites(
-        request: Request,
-        x_signature: str | None = Header(None, alias="X-Signature"),
-        x_timestamp: str | None = Header(None, alias="X-Timestamp"),
-    ) -> JSONResponse:
+    async def api_list_sites() -> ORJSONResponse:
         """
         Allowlisted action: list sites via fm list.
         """
-        await require_auth(request, x_signature, x_timestamp)
-        
         try:
             sites = list_sites(app.state.fm_binary)
-            return JSONResponse({"ok": True, "sites": sites})
+            return ORJSONResponse({"ok": True, "sites": sites})
         except Exception as e:
-            return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
+            return ORJSONResponse({"ok": False, "error": str(e)}, status_code=500)
     
     @app.post("/api/backup_site")
-    async def api_backup_site(
-        request: Request,
-        x_signature: str | None = Header(None, alias="X-Signature"),
-        x_timestamp: str | None = Header(None, alias="X-Timestamp"),
-    ) -> JSONResponse:
+    async def api_backup_site(request: Request) -> ORJSONResponse:
         """
         Allowlisted action: backup site via fm shell + bench.
         """
-        await require_auth(request, x_signature, x_timestamp)
-        
         try:
             payload = await request.json()
             site = str(payload.get("site") or "")
             stack = str(payload.get("stack") or "")
             
             if not site:
-                return JSONResponse({"ok": False, "error": "site_required"}, status_code=400)
+                return ORJSONResponse({"ok": False, "error": "site_required"}, status_code=400)
             
             # Validate site name (basic safety)
-            if not all(c.isalnum() or c in "._-" for c in site):
-                return JSONResponse({"ok": False, "error": "invalid_site"}, status_code=400)
+            if not _SITE_RE.fullmatch(site):
+                return ORJSONResponse({"ok": False, "error": "invalid_site"}, status_code=400)
             
             result = execute_backup_via_fm_shell(app.state.fm_binary, site)
             
@@ -139,128 +444,49 @@ def create_app(*, fm_binary: Path | None, shared_secret: str | None) -> FastAPI:
             result["stack"] = stack
             result["site"] = site
             
-            return JSONResponse(result, status_code=200 if result.get("ok") else 500)
+            return ORJSONResponse(result, status_code=200 if result.get("ok") else 500)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return JSONResponse({"ok": False, "error": str(e), "traceback": traceback.format_exc()}, status_code=500)
+            # Full traceback goes to the agent log, not to the client
+            logger.exception("backup_site failed")
+            return ORJSONResponse({"ok": False, "error": str(e)}, status_code=500)
     
     @app.get("/api/backup_artifacts/{site}")
-    async def api_backup_artifacts(
-        site: str,
-        request: Request,
-        x_signature: str | None = Header(None, alias="X-Signature"),
-        x_timestamp: str | None = Header(None, alias="X-Timestamp"),
-    ) -> JSONResponse:
+    async def api_backup_artifacts(site: str) -> ORJSONResponse:
         """
         Allowlisted action: list backup artifacts for a site.
         Used by dashboard to discover backup files after backup completes.
         """
-        await require_auth(request, x_signature, x_timestamp)
-        
         # TODO: Discover backup artifacts from bench backup output
         # For now, return empty list
-        return JSONResponse({"ok": True, "artifacts": []})
+        return ORJSONResponse({"ok": True, "artifacts": []})
     
     @app.get("/api/download_artifact")
-    async def api_download_artifact(
-        path: str,
-        request: Request,
-        x_signature: str | None = Header(None, alias="X-Signature"),
-        x_timestamp: str | None = Header(None, alias="X-Timestamp"),
-    ):
+    async def api_download_artifact(path: str):
         """
         Download a backup artifact file from agent.
         Path must be relative (e.g., ./site/private/backups/file.sql.gz)
         """
-        from fastapi.responses import FileResponse
-        import subprocess
-        await require_auth(request, x_signature, x_timestamp)
-        
         # Security: only allow paths starting with ./ (relative)
         if not path.startswith('./'):
-            return JSONResponse({"ok": False, "error": "invalid_path"}, status_code=400)
+            return ORJSONResponse({"ok": False, "error": "invalid_path"}, status_code=400)
         
         # Security: ensure path contains backup directory
         if 'private/backups' not in path:
-            return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+            return ORJSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
         
         # Extract site name from path (e.g., ./dev.mby-solution.vip/private/backups/...)
         path_parts = path.lstrip('./').split('/')
         if len(path_parts) < 3:
-            return JSONResponse({"ok": False, "error": "invalid_path"}, status_code=400)
+            return ORJSONResponse({"ok": False, "error": "invalid_path"}, status_code=400)
         
         site_name = path_parts[0]
         
-        # Get site's directory from fm list
+        # Get site's directory from fm list (cached per site)
         try:
-            proc = subprocess.run(
-                [str(app.state.fm_binary), "list"],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=10,
-            )
-            
-            # Parse output to find site path
-            # Note: fm list may truncate paths with '…', so we need to find the full path
-            site_root = None
-            truncated_path = None
-            
-            for line in proc.stdout.split('\n'):
-                if site_name in line and '│' in line:
-                    # Extract path from table: │ site │ status │ path │
-                    parts = [p.strip() for p in line.split('│') if p.strip()]
-                    if len(parts) >= 3 and parts[0] == site_name:
-                        truncated_path = parts[2].rstrip('…').rstrip('.')
-                        break
-            
-            # If path is truncated or doesn't exist, search for full path
-            # Check if truncated_path exists and is valid
-            if truncated_path:
-                test_path = Path(truncated_path)
-                if test_path.exists() and (test_path / "workspace" / "frappe-bench").exists():
-                    site_root = test_path
-                else:
-                    # Path is truncated or invalid, search for full path
-                    common_bases = [
-                        Path("/home/baron/frappe/sites"),
-                        Path("/opt/frappe/sites"),
-                        Path("/srv/frappe/sites"),
-                        Path.home() / "frappe" / "sites",
-                    ]
-                    
-                    for base in common_bases:
-                        if base.exists():
-                            for site_dir in base.iterdir():
-                                if site_dir.is_dir() and site_name in site_dir.name:
-                                    # Check if this looks like the right site
-                                    if (site_dir / "workspace" / "frappe-bench").exists():
-                                        site_root = site_dir
-                                        break
-                            if site_root:
-                                break
-            else:
-                # No path found in fm list, search anyway
-                common_bases = [
-                    Path("/home/baron/frappe/sites"),
-                    Path("/opt/frappe/sites"),
-                    Path("/srv/frappe/sites"),
-                    Path.home() / "frappe" / "sites",
-                ]
-                
-                for base in common_bases:
-                    if base.exists():
-                        for site_dir in base.iterdir():
-                            if site_dir.is_dir() and site_name in site_dir.name:
-                                if (site_dir / "workspace" / "frappe-bench").exists():
-                                    site_root = site_dir
-                                    break
-                        if site_root:
-                            break
+            site_root, truncated_path = await lookup_site_root(site_name)
             
             if not site_root or not site_root.exists():
-                return JSONResponse({"ok": False, "error": "site_not_found", "tried": str(truncated_path)}, status_code=404)
+                return ORJSONResponse({"ok": False, "error": "site_not_found", "tried": str(truncated_path)}, status_code=404)
             
             # Construct absolute path: site_root/workspace/frappe-bench/sites/ + relative path
             # Path from bench is relative to frappe-bench/sites directory
@@ -268,22 +494,32 @@ def create_app(*, fm_binary: Path | None, shared_secret: str | None) -> FastAPI:
             file_path = bench_root / path.lstrip('./')
             
             if not file_path.exists() or not file_path.is_file():
-                return JSONResponse({"ok": False, "error": "file_not_found", "tried": str(file_path)}, status_code=404)
+                return ORJSONResponse({"ok": False, "error": "file_not_found", "tried": str(file_path)}, status_code=404)
             
-            return FileResponse(path=str(file_path), filename=file_path.name)
+            return ArtifactFileResponse(
+                path=str(file_path),
+                filename=file_path.name,
+                media_type="application/octet-stream",
+            )
             
         except Exception as e:
-            return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
+            return ORJSONResponse({"ok": False, "error": str(e)}, status_code=500)
     
     @app.get("/api/time")
-    async def api_time() -> JSONResponse:
+    async def api_time() -> Response:
         """Get current agent server time (no auth required)"""
-        import time
-        return JSONResponse({
-            "timestamp": int(time.time()),
-            "datetime": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-            "timezone": time.strftime("%Z")
-        })
+        global _time_cache
+        ts = int(time.time())
+        cached_ts, body = _time_cache
+        if ts != cached_ts:
+            # Rebuilt at most once per second; bursts of polls reuse the bytes
+            body = orjson.dumps({
+                "timestamp": ts,
+                "datetime": datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds"),
+                "timezone": time.localtime(ts).tm_zone,
+            })
+            _time_cache = (ts, body)
+        return Response(content=body, media_type="application/json")
     
     return app
 
@@ -3,8 +3,12 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import socket
 import sys
+import time
+from collections import defaultdict
 from pathlib import Path
+from typing import Any
 
 import httpx
 import uvicorn
@@ -13,11 +17,33 @@ from uvicorn import Config, Server
 from .agent_id import generate_stable_agent_id
 from .app import create_app
 from .dashboard_discovery import discover_dashboard
-from .fm_discovery import find_fm_binary
+from .fm_discovery import find_fm_binary, fm_sites_mtime
 from .fm_list_parser import list_sites
 from .paths import agent_db_path, agent_state_dir
 from .security import sign_request
 
+_HOSTNAME = socket.gethostname()
+
+# Rebuild announce meta at least this often even if no sites dir changed
+_META_MAX_AGE = 3600.0
+
+
+def _group_sites_by_stack(sites: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Group `list_sites` output by stack into the dashboard meta format:
+    [{"stack": "default", "sites": ["a.example.com", ...]}]
+    """
+    stacks_dict: defaultdict[str, list[str]] = defaultdict(list)
+    for site_info in sites:
+        site = str(site_info.get("site") or "")
+        if site:
+            stacks_dict[str(site_info.get("stack") or "default")].append(site)
+    
+    return [
+        {"stack": stack, "sites": sites_list}
+        for stack, sites_list in stacks_dict.items()
+    ]
+
 
 def main() -> None:
     """CLI entrypoint for pipx installation."""
@@ -66,28 +92,14 @@ def run() -> None:
         # Register with dashboard
         try:
             meta = {
-                "hostname": __import__("socket").gethostname(),
+                "hostname": _HOSTNAME,
                 "fm_version": "unknown",  # Could parse from fm --version if needed
             }
             
             # Get sites for meta (group by stack)
             try:
                 sites = list_sites(fm_binary)
-                # Group sites by stack
-                stacks_dict: dict[str, list[str]] = {}
-                for site_info in sites:
-                    stack = str(site_info.get("stack") or "default")
-                    site = str(site_info.get("site") or "")
-                    if site:
-                        if stack not in stacks_dict:
-                            stacks_dict[stack] = []
-                        stacks_dict[stack].append(site)
-                
-                # Convert to expected format
-                meta["stacks"] = [
-                    {"stack": stack, "sites": sites_list}
-                    for stack, sites_list in stacks_dict.items()
-                ]
+                meta["stacks"] = _group_sites_by_stack(sites)
             except Exception:
                 pass
             
@@ -130,7 +142,13 @@ def run() -> None:
     @app.on_event("startup")
     async def startup_periodic_announce():
         """Periodically re-register with dashboard to maintain presence"""
-        import asyncio
+        # One pooled client keeps the dashboard connection alive between
+        # announces instead of a new TCP/TLS handshake every 5 minutes
+        app.state.dashboard_client = (
+            httpx.AsyncClient(base_url=dashboard_url, timeout=10.0) if dashboard_url else None
+        )
+        # (meta, monotonic time built, fm_sites_mtime() at build time)
+        app.state.announce_meta_cache = (None, 0.0, ())
         
         async def announce_loop():
             try:
@@ -140,35 +158,35 @@ def run() -> None:
                     try:
                         await asyncio.sleep(300)  # Every 5 minutes
                         
-                        if not dashboard_url or not shared_secret:
+                        client = app.state.dashboard_client
+                        if client is None or not shared_secret:
                             continue
                         
                         # Re-fetch sites for updated meta
                         try:
-                            sites = list_sites(fm_binary)
-                            stacks_dict: dict[str, list[str]] = {}
-                            for site_info in sites:
-                                stack = str(site_info.get("stack") or "default")
-                                site = str(site_info.get("site") or "")
-                                if site:
-                                    if stack not in stacks_dict:
-                                        stacks_dict[stack] = []
-                                    stacks_dict[stack].append(site)
-                            
-                            meta = {
-                                "hostname": __import__("socket").gethostname(),
-                                "stacks": [
-                                    {"stack": stack, "sites": sites_list}
-                                    for stack, sites_list in stacks_dict.items()
-                                ]
-                            }
+                            sites_mtime = fm_sites_mtime()
+                            cached_meta, cached_at, cached_mtime = app.state.announce_meta_cache
+                            if (
+                                cached_meta is not None
+                                and sites_mtime
+                                and sites_mtime == cached_mtime
+                                and time.monotonic() - cached_at < _META_MAX_AGE
+                            ):
+                                meta = cached_meta
+                            else:
+                                sites = list_sites(fm_binary)
+                                meta = {
+                                    "hostname": _HOSTNAME,
+                                    "stacks": _group_sites_by_stack(sites),
+                                }
+                                app.state.announce_meta_cache = (meta, time.monotonic(), sites_mtime)
                         except Exception:
-                            meta = {"hostname": __import__("socket").gethostname()}
+                            meta = {"hostname": _HOSTNAME}
                         
                         # Re-register
                         try:
-                            resp = httpx.post(
-                                f"{dashboard_url}/api/agents/register",
+                            resp = await client.post(
+                                "/api/agents/register",
                                 json={
                                     "token": "reannounce",  # Special token
                                     "agent_id": agent_id,
@@ -176,7 +194,6 @@ def run() -> None:
                                     "meta": meta,
                                     "base_url": agent_base_url,
                                 },
-                                timeout=10.0,
                             )
                             if resp.status_code == 200:
                                 print(f"✓ Re-announced to dashboard", flush=True)
@@ -197,10 +214,29 @@ def run() -> None:
         # Store task for cleanup
         app.state.announce_task = announce_task
     
+    @app.on_event("shutdown")
+    async def shutdown_periodic_announce():
+        """Stop re-announcing and close the dashboard client"""
+        announce_task = getattr(app.state, "announce_task", None)
+        if announce_task is not None:
+            announce_task.cancel()
+        client = getattr(app.state, "dashboard_client", None)
+        if client is not None:
+            await client.aclose()
+    
     print("Starting agent API on http://0.0.0.0:8888")
     print("Press Ctrl+C to stop", flush=True)
     
-    config = Config(app, host="0.0.0.0", port=8888, log_level="info")
+    # uvloop + httptools for throughput; per-request access logging is off
+    config = Config(
+        app,
+        host="0.0.0.0",
+        port=8888,
+        log_level="warning",
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+    )
     server = Server(config)
     
     try:
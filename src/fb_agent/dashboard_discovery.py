@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-import json
+import selectors
 import socket
+import sys
 import time
 from typing import Any
 
+import orjson
+
 
 DISCOVERY_PORT = 7355
 
+_SOCKET_BUFFER_BYTES = 4_000_000
+# Linux <linux/in.h> values; not every Python build exposes them
+_IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+_IP_PMTUDISC_DO = getattr(socket, "IP_PMTUDISC_DO", 2)
+
 
 def discover_dashboard(agent_id: str, agent_port: int, timeout: float = 5.0) -> dict[str, Any] | None:
     """
@@ -16,30 +24,51 @@ def discover_dashboard(agent_id: str, agent_port: int, timeout: float = 5.0) ->
     """
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    sock.settimeout(timeout)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Default UDP buffers are small; a busy network can drop the reply
+    # (the kernel clamps these to net.core.{r,w}mem_max)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_BYTES)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_BYTES)
+    if sys.platform.startswith("linux"):
+        # Never fragment discovery datagrams
+        sock.setsockopt(socket.IPPROTO_IP, _IP_MTU_DISCOVER, _IP_PMTUDISC_DO)
+    # Waiting is done by the selector, not by a socket timeout
+    sock.setblocking(False)
     
     try:
         # Broadcast discovery packet matching dashboard protocol
-        packet = json.dumps({
+        packet = orjson.dumps({
             "type": "fb-agent.hello",
             "agent_id": agent_id,
             "port": agent_port,
-        }).encode()
+        })
         sock.sendto(packet, ("255.255.255.255", DISCOVERY_PORT))
         
-        # Wait for reply
-        data, addr = sock.recvfrom(4096)
-        reply = json.loads(data.decode())
-        
-        if reply.get("type") == "fb.dashboard.offer":
-            return {
-                "base_url": reply.get("dashboard_url", ""),
-                "token": reply.get("token", ""),
-            }
-    except (socket.timeout, json.JSONDecodeError, KeyError):
+        # Wait for a dashboard reply; other traffic on the port is ignored
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as sel:
+            sel.register(sock, selectors.EVENT_READ)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(timeout=remaining):
+                    return None
+                try:
+                    data, addr = sock.recvfrom(4096)
+                except BlockingIOError:
+                    continue
+                try:
+                    reply = orjson.loads(data)
+                except orjson.JSONDecodeError:
+                    continue
+                
+                if isinstance(reply, dict) and reply.get("type") == "fb.dashboard.offer":
+                    return {
+                        "base_url": reply.get("dashboard_url", ""),
+                        "token": reply.get("token", ""),
+                    }
+    except OSError:
+        # e.g. no route for broadcast: treat as "dashboard not found"
         return None
     finally:
         sock.close()
-    
-    return None
 
@@ -3,14 +3,56 @@ from __future__ import annotations
 import shutil
 from pathlib import Path
 
+# Where Frappe Manager keeps site directories
+FM_SITES_BASES = (
+    Path("/home/baron/frappe/sites"),
+    Path("/opt/frappe/sites"),
+    Path("/srv/frappe/sites"),
+    Path.home() / "frappe" / "sites",
+)
+
+# Last PATH lookup result: (fm path, its st_mtime_ns)
+_fm_binary_cache: tuple[Path, int] | None = None
+
 
 def find_fm_binary() -> Path | None:
     """
     Discover fm binary via PATH.
     Returns None if not found.
+    The result is cached and revalidated with one stat() per call.
     """
+    global _fm_binary_cache
+    if _fm_binary_cache is not None:
+        cached_path, cached_mtime = _fm_binary_cache
+        try:
+            if cached_path.stat().st_mtime_ns == cached_mtime:
+                return cached_path
+        except OSError:
+            pass
+        # fm was reinstalled or removed: search PATH again
+        _fm_binary_cache = None
+    
     fm_path = shutil.which("fm")
     if fm_path:
-        return Path(fm_path)
+        path = Path(fm_path)
+        try:
+            _fm_binary_cache = (path, path.stat().st_mtime_ns)
+        except OSError:
+            pass
+        return path
     return None
 
+
+def fm_sites_mtime() -> tuple[int, ...]:
+    """
+    Cheap change signal for the set of fm sites: mtimes of the existing
+    sites base directories (a site added/removed touches its base).
+    Empty when no known base exists.
+    """
+    mtimes: list[int] = []
+    for base in FM_SITES_BASES:
+        try:
+            mtimes.append(base.stat().st_mtime_ns)
+        except OSError:
+            continue
+    return tuple(mtimes)
@@ -1,15 +1,97 @@
 from __future__ import annotations
 
+import io
 import json
+import os
 import re
+import signal
 import subprocess
+import threading
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
+# Box-drawing characters that only appear in table borders/header rules.
+# NOTE: keep "┃" out of this set because some fm versions use it
+# for actual data rows, not just headers/borders.
+_BORDER_CHARS = frozenset("┏┗┓┛┣┫╋━┳┻╇┡└")
+_ASCII_BORDER_RE = re.compile(r"[-+|= ]+")
 
-def parse_fm_list_output(output: str) -> list[dict[str, Any]]:
+# First-column values of table header rows
+_HEADER_CELLS = frozenset(("site", "sites"))
+
+_ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+# Old list format in one pass: "Stack: <name>" or "- <site>" / "• <site>"
+_LIST_LINE_RE = re.compile(r"^(?:Stack:\s*(?P<stack>.+)|[-•]\s*(?P<site>.+))$", re.IGNORECASE)
+
+# Fallback: site names inside bench paths (.../sites/<site_name>)
+_SITES_PATH_RE = re.compile(r"/sites/([A-Za-z0-9._-]+)")
+
+# Read `fm list` output in large chunks
+_PIPE_BUFFER_SIZE = 1024 * 1024
+
+
+def _first_cell(line: str, sep: str) -> str:
     """
-    Parse `fm list` output robustly.
+    First non-empty column of a table row that starts with `sep`.
+    Only the site column is ever used, so avoid splitting the whole row.
+    """
+    start = 1
+    while True:
+        idx = line.find(sep, start)
+        cell = line[start:].strip() if idx == -1 else line[start:idx].strip()
+        if cell or idx == -1:
+            return cell
+        start = idx + 1
+
+
+def _clean_line(line: str) -> str:
+    # Remove ANSI color/control sequences before parsing.
+    if "\x1b" in line:
+        line = _ANSI_ESCAPE_RE.sub("", line)
+    return line.strip()
+
+
+def _is_border(line_stripped: str) -> bool:
+    """Common table border lines (unicode/ascii)."""
+    return not _BORDER_CHARS.isdisjoint(line_stripped) or (
+        line_stripped[0] in "-+|= " and _ASCII_BORDER_RE.fullmatch(line_stripped) is not None
+    )
+
+
+def _table_row_site(line_stripped: str) -> str | None:
+    """
+    Site of a table row in unicode/ascii pipe formats, None otherwise.
+    Examples:
+      │ al.com │ Active │ /path │
+      ┃ al.com ┃ Active ┃ /path ┃
+      | al.com | Active | /path |
+    """
+    sep = line_stripped[0]
+    if sep not in "│┃|":
+        return None
+    site = _first_cell(line_stripped, sep)
+    # Skip headers/separators
+    if site and site.lower() not in _HEADER_CELLS and "━" not in site and "─" not in site:
+        return site
+    return None
+
+
+def _iter_table_rows(lines: Iterator[str]) -> Iterator[dict[str, Any]]:
+    """Tight loop for the rest of the output once it is known to be a table."""
+    for line in lines:
+        line_stripped = _clean_line(line)
+        if not line_stripped or _is_border(line_stripped):
+            continue
+        site = _table_row_site(line_stripped)
+        if site is not None:
+            yield {"stack": "default", "site": site}
+
+
+def iter_fm_list_output(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """
+    Parse `fm list` output robustly, one line at a time.
     
     Supports both formats:
     1. Table format (new):
@@ -21,101 +103,130 @@ def parse_fm_list_output(output: str) -> list[dict[str, Any]]:
         Sites:
           - site1.example.com
     
-    Returns normalized JSON list:
-    [
-      {"stack": "default", "site": "dev.mby-solution.vip"},
-    ]
+    Yields normalized JSON items:
+      {"stack": "default", "site": "dev.mby-solution.vip"}
     """
-    result: list[dict[str, Any]] = []
+    found = False
     current_stack: str | None = None
     in_table = False
-    
-    ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+    # Raw lines kept only until the first site is found (for the fallback)
+    unparsed: list[str] = []
+    it = iter(lines)
+
+    for line in it:
+        if not found:
+            unparsed.append(line)
 
-    for line in output.splitlines():
-        # Remove ANSI color/control sequences before parsing.
-        line_clean = ansi_escape.sub("", line)
-        line_stripped = line_clean.strip()
+        line_stripped = _clean_line(line)
         if not line_stripped:
             continue
 
-        # Skip common table border lines (unicode/ascii).
-        # NOTE: keep "┃" out of this check because some fm versions use it
-        # for actual data rows, not just headers/borders.
-        if (
-            any(char in line_stripped for char in ["┏", "┗", "┓", "┛", "┣", "┫", "╋", "━", "┳", "┻", "╇", "┡", "└"])
-            or re.fullmatch(r"[-+|= ]+", line_stripped)
-        ):
+        if _is_border(line_stripped):
             in_table = True
-            continue
-
-        # Parse table rows in unicode/ascii pipe formats.
-        # Examples:
-        #   │ al.com │ Active │ /path │
-        #   ┃ al.com ┃ Active ┃ /path ┃
-        #   | al.com | Active | /path |
-        for sep in ("│", "┃", "|"):
-            if sep in line_stripped and line_stripped.startswith(sep):
-                parts = [p.strip() for p in line_stripped.split(sep) if p.strip()]
-                if parts:
-                    site = parts[0].strip()
-                    # Skip headers/separators
-                    if site and site.lower() not in {"site", "sites"} and "━" not in site and "─" not in site:
-                        result.append({"stack": "default", "site": site})
-                        in_table = True
-                        break
         else:
-            # Not a table row; continue with old-format parsing below.
-            pass
-        if in_table and result:
-            # Row already parsed as table format.
-            continue
-        
-        # Match "Stack: <name>" (old format)
-        stack_match = re.match(r"^Stack:\s*(.+)$", line_stripped, re.IGNORECASE)
-        if stack_match:
-            current_stack = stack_match.group(1).strip()
-            continue
-        
-        # Match site list items: "- <site>" or "  - <site>" (old format)
-        site_match = re.match(r"^[-•]\s*(.+)$", line_stripped)
-        if site_match:
-            site = site_match.group(1).strip()
-            if site:
-                stack = current_stack or "default"
-                result.append({"stack": stack, "site": site})
+            site = _table_row_site(line_stripped)
+            if site is not None:
+                found = in_table = True
+                yield {"stack": "default", "site": site}
+            else:
+                # Match "Stack: <name>" or site list items "- <site>" (old format)
+                m = _LIST_LINE_RE.match(line_stripped) if line_stripped[0] in "sS-•" else None
+                if m is None:
+                    continue
+                if m.lastgroup == "stack":
+                    current_stack = m.group("stack").strip()
+                    continue
+                site = m.group("site").strip()
+                if not site:
+                    continue
+                found = True
+                yield {"stack": current_stack or "default", "site": site}
+
+        if in_table and found:
+            # Table format detected: old-format lines are ignored from here
+            # on, so finish with the table-only loop.
+            yield from _iter_table_rows(it)
+            return
 
     # Fallback: some fm versions/term modes render table output in a way
     # that does not preserve clean column separators. If primary parsing
     # yields nothing, extract site names from common bench paths:
     #   .../sites/<site_name>
-    if not result:
+    if not found:
         seen: set[str] = set()
-        for m in re.finditer(r"/sites/([A-Za-z0-9._-]+)", output):
+        for m in _SITES_PATH_RE.finditer("\n".join(unparsed)):
             site = m.group(1).strip()
             if site and site not in seen:
                 seen.add(site)
-                result.append({"stack": "default", "site": site})
+                yield {"stack": "default", "site": site}
+
+
+def parse_fm_list_output(output: str) -> list[dict[str, Any]]:
+    """
+    Parse a complete `fm list` output into a normalized JSON list:
+    [
+      {"stack": "default", "site": "dev.mby-solution.vip"},
+    ]
+    """
+    return list(iter_fm_list_output(output.splitlines()))
+
 
-    return result
+def _kill_process_group(proc: subprocess.Popen[bytes]) -> None:
+    """
+    Kill fm and anything it spawned. Children that inherited stdout keep
+    the pipe open, so killing fm alone would not unblock the reader.
+    """
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
 
 
 def list_sites(fm_binary: Path) -> list[dict[str, Any]]:
     """
     Execute `fm list` and parse output.
-    Raises on execution failure.
+    Raises on execution failure or if fm (or anything it spawned) is
+    still running after 30 seconds.
+    """
+    return list(iter_sites(fm_binary, timeout=30))
+
+
+def iter_sites(fm_binary: Path, timeout: float = 30) -> Iterator[dict[str, Any]]:
+    """
+    Stream `fm list` and yield sites while it is still running.
+    stderr is merged into stdout since some fm versions print the table there.
+    Raises on execution failure or timeout.
     """
-    proc = subprocess.run(
-        [str(fm_binary), "list"],
-        capture_output=True,
-        text=True,
-        check=True,
-        timeout=30,
+    cmd = [str(fm_binary), "list"]
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=_PIPE_BUFFER_SIZE,
+        start_new_session=True,
     )
-    # Some fm versions/term modes print table output to stderr.
-    # Parse both streams to avoid returning an empty list unexpectedly.
-    stdout = proc.stdout or ""
-    stderr = proc.stderr or ""
-    merged = "\n".join(part for part in (stdout, stderr) if part)
-    return parse_fm_list_output(merged)
+    # Reading a pipe can't time out by itself: kill fm if it hangs
+    timed_out = threading.Event()
+
+    def kill_on_timeout() -> None:
+        timed_out.set()
+        _kill_process_group(proc)
 
+    timer = threading.Timer(timeout, kill_on_timeout)
+    timer.start()
+    assert proc.stdout is not None
+    stdout = io.TextIOWrapper(proc.stdout, encoding="utf-8", errors="replace")
+    try:
+        yield from iter_fm_list_output(stdout)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            # Consumer stopped early
+            _kill_process_group(proc)
+            proc.wait()
+        stdout.close()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
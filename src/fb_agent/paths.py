@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import os
 from pathlib import Path
 
@@ -9,7 +10,9 @@ def _ensure_dir(p: Path) -> Path:
     return p
 
 
+@functools.lru_cache(maxsize=1)
 def agent_state_dir() -> Path:
+    # Cached: env vars don't change mid-process, so mkdir only runs once
     xdg = os.environ.get("XDG_STATE_HOME") or os.environ.get("XDG_DATA_HOME")
     if xdg:
         return _ensure_dir(Path(xdg) / "fb-agent")
@@ -2,12 +2,41 @@ from __future__ import annotations
 
 import os
 import pty
-import select
+import re
+import selectors
 import subprocess
 import time
 from pathlib import Path
 from typing import Any
 
+# How often to re-check the child while the PTY is quiet (seconds)
+_IDLE_CHECK_INTERVAL = 1.0
+
+# PTY output buffering: large reads, decoded once, capped at head + tail
+_READ_SIZE = 65536
+_MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+_OUTPUT_HEAD_BYTES = 1024 * 1024
+_OUTPUT_TAIL_BYTES = 3 * 1024 * 1024
+
+# Output markers that decide whether a backup succeeded
+_SUCCESS_RE = re.compile(
+    r"successfully completed|backup (?:completed|successful|created|finished)",
+    re.IGNORECASE,
+)
+_ERROR_RE = re.compile(r"error|failed|exception|traceback", re.IGNORECASE)
+
+# Byte versions for scanning output that is about to be truncated away;
+# the overlap (longer than any marker) catches markers split across a cut
+_SUCCESS_BYTES_RE = re.compile(_SUCCESS_RE.pattern.encode("ascii"), re.IGNORECASE)
+_ERROR_BYTES_RE = re.compile(_ERROR_RE.pattern.encode("ascii"), re.IGNORECASE)
+_MARKER_OVERLAP = 64
+
+
+def _decode_output(output: bytearray, truncated: bool) -> str:
+    if truncated:
+        output = output[:_OUTPUT_HEAD_BYTES] + b"\n[... output truncated ...]\n" + output[_OUTPUT_HEAD_BYTES:]
+    return output.decode("utf-8", errors="replace")
+
 
 def execute_backup_via_fm_shell(fm_binary: Path, site: str, timeout: int = 600) -> dict[str, Any]:
     """
@@ -31,6 +60,9 @@ def execute_backup_via_fm_shell(fm_binary: Path, site: str, timeout: int = 600)
             stderr=slave_fd,
             start_new_session=True,
         )
+        # The child owns the slave side now; closing ours lets reads hit EOF
+        os.close(slave_fd)
+        slave_fd = -1
         
         # Send commands via master
         
@@ -39,65 +71,77 @@ def execute_backup_via_fm_shell(fm_binary: Path, site: str, timeout: int = 600)
             "exit\n",
         ]
         
-        output_lines: list[str] = []
+        output = bytearray()
+        truncated = False
+        # Sticky: markers seen in output that was dropped by truncation
+        has_success = False
+        has_error = False
         error_lines: list[str] = []
         
-        # Write commands and read output
+        # Write commands and read output; the PTY buffers input in order,
+        # so the shell picks each line up once it is ready
         for cmd in commands:
             os.write(master_fd, cmd.encode("utf-8"))
-            time.sleep(0.1)  # Small delay between commands
         
-        # Read output with timeout
-        start_time = time.time()
-        while proc.poll() is None:
-            if time.time() - start_time > timeout:
-                proc.kill()
-                return {
-                    "ok": False,
-                    "error": "timeout",
-                    "output": "\n".join(output_lines),
-                    "stderr": "\n".join(error_lines),
-                }
-            
-            if select.select([master_fd], [], [], 0.1)[0]:
+        # Read output with timeout; wake only when the PTY has data
+        deadline = time.monotonic() + timeout
+        sel = selectors.DefaultSelector()
+        sel.register(master_fd, selectors.EVENT_READ)
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    proc.kill()
+                    return {
+                        "ok": False,
+                        "error": "timeout",
+                        "output": _decode_output(output, truncated),
+                        "stderr": "\n".join(error_lines),
+                    }
+                
+                if not sel.select(timeout=min(remaining, _IDLE_CHECK_INTERVAL)):
+                    # Idle: a grandchild may still hold the PTY open after
+                    # fm exits, so don't rely on EOF alone
+                    if proc.poll() is not None:
+                        break
+                    continue
+                
                 try:
-                    data = os.read(master_fd, 4096).decode("utf-8", errors="replace")
-                    if data:
-                        output_lines.append(data)
+                    data = os.read(master_fd, _READ_SIZE)
                 except OSError:
+                    # EIO once every slave side is closed (process exited)
+                    break
+                if not data:
                     break
+                output += data
+                if len(output) > _MAX_OUTPUT_BYTES:
+                    # Keep the start and the end (artifact paths), but check
+                    # the dropped middle for markers first. Trimming to half
+                    # the cap leaves headroom so cuts stay rare.
+                    cut_end = len(output) - _OUTPUT_TAIL_BYTES
+                    start = _OUTPUT_HEAD_BYTES - _MARKER_OVERLAP
+                    end = cut_end + _MARKER_OVERLAP
+                    has_success = has_success or _SUCCESS_BYTES_RE.search(output, start, end) is not None
+                    has_error = has_error or _ERROR_BYTES_RE.search(output, start, end) is not None
+                    del output[_OUTPUT_HEAD_BYTES:cut_end]
+                    truncated = True
+        finally:
+            sel.close()
         
         # Wait for process to finish
         proc.wait(timeout=5)
         
-        full_output = "\n".join(output_lines)
+        full_output = _decode_output(output, truncated)
         
-        # Detect success markers
-        success_markers = [
-            "successfully completed",
-            "backup completed",
-            "backup successful",
-            "backup created",
-            "backup finished",
-        ]
-        
-        error_markers = [
-            "error",
-            "failed",
-            "exception",
-            "traceback",
-        ]
-        
-        output_lower = full_output.lower()
-        has_success = any(marker in output_lower for marker in success_markers)
-        has_error = any(marker in output_lower for marker in error_markers)
+        # Detect success/error markers (one case-insensitive scan each)
+        has_success = has_success or _SUCCESS_RE.search(full_output) is not None
+        has_error = has_error or _ERROR_RE.search(full_output) is not None
         
         ok = proc.returncode == 0 and has_success and not has_error
         
         # Extract backup file paths from output
         # Example: "Database: ./dev.mby-solution.vip/private/backups/20260114_151615-dev_mby-solution_vip-database.sql.gz"
         artifacts = []
-        # Split full_output into lines (not output_lines which are chunks)
         for line in full_output.split('\n'):
             # Look for lines like "Config  : <path>" or "Database: <path>"
             if ':' in line and ('Config' in line or 'Database' in line or 'Private' in line or 'Public' in line):
@@ -131,9 +175,10 @@ def execute_backup_via_fm_shell(fm_binary: Path, site: str, timeout: int = 600)
             "stderr": "",
         }
     finally:
-        try:
-            os.close(master_fd)
-            os.close(slave_fd)
-        except Exception:
-            pass
+        for fd in (master_fd, slave_fd):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
 
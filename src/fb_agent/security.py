@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import base64
+import functools
 import hmac
 import json
 import time
-from hashlib import sha256
 
 
 def b64url(b: bytes) -> str:
@@ -16,6 +16,25 @@ def unb64url(s: str) -> bytes:
     return base64.urlsafe_b64decode(s + pad)
 
 
+_SIGNATURE_LEN = 43
+
+
+@functools.lru_cache(maxsize=8)
+def _decode_secret(secret: str) -> bytes:
+    """unb64url for long-lived shared secrets, memoized."""
+    return unb64url(secret)
+
+
+# Pre-encoded upper-case methods for the common cases
+_METHOD_BYTES = {m: m.encode("ascii") for m in ("GET", "POST", "PUT", "PATCH", "DELETE")}
+
+
+def _signing_message(timestamp: int, method: str, path: str, body: bytes) -> bytes:
+    """Build `ts\nMETHOD\npath\nbody` in a single allocation."""
+    method_bytes = _METHOD_BYTES.get(method) or method.upper().encode("ascii")
+    return b"%d\n%s\n%s\n%s" % (timestamp, method_bytes, path.encode("utf-8"), body)
+
+
 def sign_request(secret: str, method: str, path: str, body: dict | None = None, timestamp: int | None = None) -> dict[str, str]:
     """
     Generate HMAC signature for agent->dashboard requests.
@@ -26,17 +45,15 @@ def sign_request(secret: str, method: str, path: str, body: dict | None = None,
         timestamp = int(time.time())
     
     # Match dashboard format: ts + method + path + body_json
-    body_bytes = json.dumps(body or {}, separators=(",", ":"), sort_keys=True).encode("utf-8")
-    message = b"\n".join([
-        str(timestamp).encode("ascii"),
-        method.upper().encode("ascii"),
-        path.encode("utf-8"),
-        body_bytes,
-    ])
+    if not body:
+        body_bytes = b"{}"
+    else:
+        body_bytes = json.dumps(body, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    message = _signing_message(timestamp, method, path, body_bytes)
     
     # Dashboard uses base64url-encoded secrets, decode first
-    secret_bytes = unb64url(secret)
-    mac = hmac.new(secret_bytes, message, sha256).digest()
+    secret_bytes = _decode_secret(secret)
+    mac = hmac.digest(secret_bytes, message, "sha256")
     signature = b64url(mac)
     
     return {
@@ -45,26 +62,27 @@ def sign_request(secret: str, method: str, path: str, body: dict | None = None,
     }
 
 
-def verify_request(secret: str, method: str, path: str, body: bytes, signature: str, req_timestamp: int, max_age: int = 300) -> bool:
+def verify_request(secret: str | bytes, method: str, path: str, body: bytes, signature: str, req_timestamp: int, max_age: int = 300) -> bool:
     """
     Verify HMAC signature from dashboard->agent requests.
     Matches dashboard signing format: ts + method + path + body
+    `secret` may be the base64url string or the already-decoded bytes.
     """
+    # Cheap rejections first: base64url of a 32-byte SHA-256 MAC without
+    # padding is always 43 characters
+    if len(signature) != _SIGNATURE_LEN:
+        return False
+    
     now = int(time.time())
     if abs(now - req_timestamp) > max_age:
         return False
     
     # Match dashboard signing format
-    message = b"\n".join([
-        str(req_timestamp).encode("ascii"),
-        method.upper().encode("ascii"),
-        path.encode("utf-8"),
-        body,
-    ])
+    message = _signing_message(req_timestamp, method, path, body)
     
     # Dashboard uses base64url-encoded secrets, decode first
-    secret_bytes = unb64url(secret)
-    expected_bytes = hmac.new(secret_bytes, message, sha256).digest()
+    secret_bytes = secret if isinstance(secret, bytes) else _decode_secret(secret)
+    expected_bytes = hmac.digest(secret_bytes, message, "sha256")
     expected = b64url(expected_bytes)
     
     return hmac.compare_digest(expected, signature)